@@ -1,6 +1,9 @@
+import functools
+import math
+import re
+from types import MappingProxyType
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import numpy as np
 
 # --- Page and Layout Configuration ---
@@ -12,7 +15,7 @@ st.set_page_config(
 )
 
 # --- CSS for a Static, Fixed Layout ---
-st.markdown("""
+_CSS = """
 <style>
     /* Define a fixed width for the sidebar */
     [data-testid="stSidebar"] {
@@ -43,6 +46,8 @@ st.markdown("""
     }
 
     /* Custom metric styling */
+    .kpi-grid { display: grid; grid-template-columns: repeat(3, 1fr); gap: 1rem; }
+    @media (max-width: 640px) { .kpi-grid { grid-template-columns: 1fr; } }
     .metric-container {
         background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
         padding: 1rem; border-radius: 10px; margin: 0.5rem 0;
@@ -74,24 +79,33 @@ st.markdown("""
         border: 1px solid #f39c12; border-radius: 8px; padding: 1rem;
         margin: 1rem 0; color: #8b4513; box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
     }
+
+    /* Static summary table styling */
+    .summary-table { width: 100%; }
+    .summary-table td:not(:first-child), .summary-table th:not(:first-child) { text-align: right; }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource
+def _inject_css():
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+_inject_css()
 
 # --- Utility Functions ---
+# Indian digit grouping: last three digits, then groups of two (12,34,56,789)
+_INDIAN_GROUPING = re.compile(r'(\d)(?=(\d\d)+\d$)')
+
+@functools.lru_cache(maxsize=1024)
+def _format_paise(amount):
+    if amount == 0: return "₹0.00"
+    integer_part, decimal_part = f"{abs(amount):.2f}".split('.')
+    formatted = _INDIAN_GROUPING.sub(r'\1,', integer_part)
+    return f"₹{('-' if amount < 0 else '')}{formatted}.{decimal_part}"
+
 def format_currency(amount):
-    try:
-        if amount == 0: return "₹0.00"
-        amount_str = f"{abs(amount):.2f}"
-        integer_part, decimal_part = amount_str.split('.')
-        last_three = integer_part[-3:]
-        remaining = integer_part[:-3]
-        if remaining:
-            groups = [remaining[max(0, i-2):i] for i in range(len(remaining), 0, -2)][::-1]
-            formatted = ','.join(groups) + ',' + last_three
-        else:
-            formatted = last_three
-        return f"₹{('-' if amount < 0 else '')}{formatted}.{decimal_part}"
-    except: return "N/A"
+    if not isinstance(amount, (int, float, np.integer, np.floating)) or not math.isfinite(amount): return "N/A"
+    return _format_paise(round(float(amount), 2))
 
 # --- Configuration Dictionaries ---
 RATIOS_INFO = {
@@ -104,8 +118,10 @@ RATIOS_INFO = {
     "ROCE": {"formula": "(EBIT / Capital Employed) × 100", "explanation": "Return on Capital Employed, measuring profitability relative to capital invested."},
     "ROE": {"formula": "(Net Profit / Equity) × 100", "explanation": "Return on Equity, showing the return generated for shareholders' investment."}
 }
+# Tooltip markup per ratio
+_METRIC_TOOLTIPS = {k: f'<span class="tooltiptext"><strong>Formula:</strong> {v["formula"]}<br><strong>Explanation:</strong> {v["explanation"]}</span>' for k, v in RATIOS_INFO.items()}
 
-CONFIG = {
+_CONFIG = {
     "Operational": {"hours_per_day": {"label": "Production Hours/Day", "type": "number", "min_value": 5, "max_value": 24, "value": 10, "step": 1}, "days_per_month": {"label": "Operational Days/Month", "type": "number", "min_value": 1, "max_value": 31, "value": 24, "step": 1}},
     "Production": {"paddy_rate_kg_hr": {"label": "Paddy Processing Rate (kg/hr)", "type": "number", "value": 1000, "step": 10}, "paddy_yield": {"label": "Poha Yield (%)", "type": "number", "min_value": 50.0, "max_value": 80.0, "value": 65.0, "step": 0.1}, "byproduct_sale_percent": {"label": "Byproduct Sale (%)", "type": "slider", "min_value": 0.0, "max_value": 40.0, "value": 32.0, "step": 0.1}},
     "Pricing": {"paddy_rate": {"label": "Paddy Purchase Rate (₹/kg)", "type": "number", "value": 22.0, "step": 0.1}, "poha_price": {"label": "Poha Selling Price (₹/kg)", "type": "number", "value": 45.0, "step": 0.1}, "byproduct_rate_kg": {"label": "Byproduct Selling Rate (₹/kg)", "type": "number", "value": 7.0, "step": 0.1}},
@@ -114,187 +130,270 @@ CONFIG = {
     "Finance": {"equity_contrib": {"label": "Equity Contribution (%)", "type": "number", "min_value": 0.0, "max_value": 100.0, "value": 30.0, "step": 0.1}, "interest_rate": {"label": "Interest Rate (%)", "type": "number", "value": 9.0, "step": 0.01}, "tax_rate_percent": {"label": "Corporate Tax Rate (%)", "type": "number", "min_value": 0.0, "max_value": 50.0, "value": 25.0, "step": 0.1}},
     "Working Capital": {"rm_inventory_days": {"label": "RM Inventory Days", "type": "number", "value": 72, "step": 1}, "fg_inventory_days": {"label": "FG Inventory Days", "type": "number", "value": 20, "step": 1}, "debtor_days": {"label": "Debtor Days (Receivables)", "type": "number", "value": 45, "step": 1}, "creditor_days": {"label": "Creditor Days (Payables)", "type": "number", "value": 5, "step": 1}}
 }
+# Read-only at every level: sections, widgets and each widget's settings
+CONFIG = MappingProxyType({s: MappingProxyType({k: MappingProxyType(c) for k, c in p.items()}) for s, p in _CONFIG.items()})
 
 # --- Sidebar Rendering ---
+_WIDGETS = {"number": st.number_input, "slider": st.slider}
+_SIDEBAR_SPEC = [(section, [(key, _WIDGETS[config["type"]], config["label"], config.get("value"), {k: v for k, v in config.items() if k not in ("type", "label", "value")}) for key, config in params.items()]) for section, params in CONFIG.items()]
+
 def render_sidebar():
     inputs = {}
     st.sidebar.header("⚙️ Parameters")
-    for section, params in CONFIG.items():
+    for section, widgets in _SIDEBAR_SPEC:
         with st.sidebar.expander(section, expanded=True):
-            for key, config in params.items():
-                input_type = config["type"]
-                label = config["label"]
-                value = config.get("value")
-                kwargs = {k: v for k, v in config.items() if k not in ["type", "label", "value"]}
-                if input_type == "number": inputs[key] = st.number_input(label, value=value, **kwargs)
-                elif input_type == "slider": inputs[key] = st.slider(label, value=value, **kwargs)
+            for key, widget, label, value, kwargs in widgets:
+                inputs[key] = widget(label, value=value, **kwargs)
     return inputs
 
 # --- Financial Calculation Engine ---
-def calculate_financials(inputs):
-    # This function remains the same as your provided version
-    total_capex = inputs['land_cost'] + inputs['civil_work_cost'] + inputs['machinery_cost']
-    if any(v <= 0 for v in [inputs['paddy_yield'], inputs['poha_price'], total_capex]): return {'error': 'Invalid inputs: Yield, Price, and Capex must be > 0'}
-    daily_paddy = inputs['paddy_rate_kg_hr'] * inputs['hours_per_day']
-    annual_paddy = daily_paddy * inputs['days_per_month'] * 12
-    annual_poha = annual_paddy * (inputs['paddy_yield'] / 100)
-    daily_byproduct_gen = daily_paddy - (daily_paddy * (inputs['paddy_yield'] / 100))
-    daily_byproduct_target = daily_paddy * (inputs['byproduct_sale_percent'] / 100)
-    daily_byproduct_sold = min(daily_byproduct_target, daily_byproduct_gen)
-    annual_byproduct_sold = daily_byproduct_sold * inputs['days_per_month'] * 12
+def _guarded_div(num, den, ok, fallback=0):
+    # Elementwise num / den where `ok` holds, `fallback` elsewhere
+    return np.where(ok, num / np.where(ok, den, 1), fallback)
+
+def _inputs_valid(inputs):
+    # Yield, Price and Capex must be > 0; evaluates elementwise when one input is a sweep array
+    return (inputs['paddy_yield'] > 0) & (inputs['poha_price'] > 0) & (inputs['land_cost'] + inputs['civil_work_cost'] + inputs['machinery_cost'] > 0)
+
+def _financials_core(hours_per_day, days_per_month, paddy_rate_kg_hr, paddy_yield, byproduct_sale_percent, paddy_rate, poha_price, byproduct_rate_kg,
+                     land_cost, civil_work_cost, machinery_cost, machinery_useful_life_years, packaging_cost, fuel_cost, other_var_cost,
+                     rent_per_month, labor_per_month, electricity_per_month, security_ssc_insurance_per_month, misc_per_month,
+                     equity_contrib, interest_rate, tax_rate_percent, rm_inventory_days, fg_inventory_days, debtor_days, creditor_days):
+    # Financial model over one value per CONFIG key; any parameter may be a NumPy array
+    total_capex = land_cost + civil_work_cost + machinery_cost
+    operating_days = days_per_month * 12
+    daily_paddy = paddy_rate_kg_hr * hours_per_day
+    annual_paddy = daily_paddy * operating_days
+    yield_frac = paddy_yield / 100
+    annual_poha = annual_paddy * yield_frac
+    daily_byproduct_gen = daily_paddy - (daily_paddy * yield_frac)
+    monthly_byproduct_gen = daily_byproduct_gen * days_per_month
+    annual_byproduct_gen = monthly_byproduct_gen * 12
+    daily_byproduct_target = daily_paddy * (byproduct_sale_percent / 100)
+    daily_byproduct_sold = np.minimum(daily_byproduct_target, daily_byproduct_gen)
+    annual_byproduct_sold = daily_byproduct_sold * operating_days
     byproduct_limit_hit = daily_byproduct_target > daily_byproduct_gen
-    annual_poha_revenue = annual_poha * inputs['poha_price']
-    annual_byproduct_revenue = annual_byproduct_sold * inputs['byproduct_rate_kg']
+    annual_poha_revenue = annual_poha * poha_price
+    annual_byproduct_revenue = annual_byproduct_sold * byproduct_rate_kg
     annual_revenue = annual_poha_revenue + annual_byproduct_revenue
-    annual_cogs = annual_paddy * inputs['paddy_rate']
+    annual_cogs = annual_paddy * paddy_rate
     gross_profit = annual_revenue - annual_cogs
-    var_cost_per_kg = inputs['packaging_cost'] + inputs['fuel_cost'] + inputs['other_var_cost']
+    var_cost_per_kg = packaging_cost + fuel_cost + other_var_cost
     annual_var_costs = annual_paddy * var_cost_per_kg
-    annual_fixed_opex = sum([inputs[k] for k in ['rent_per_month', 'labor_per_month', 'electricity_per_month', 'security_ssc_insurance_per_month', 'misc_per_month']]) * 12
-    annual_depreciation = (inputs['machinery_cost'] + inputs['civil_work_cost']) / inputs['machinery_useful_life_years'] if inputs['machinery_useful_life_years'] > 0 else 0
+    annual_fixed_opex = (rent_per_month + labor_per_month + electricity_per_month + security_ssc_insurance_per_month + misc_per_month) * 12
+    annual_depreciation = _guarded_div(machinery_cost + civil_work_cost, machinery_useful_life_years, machinery_useful_life_years > 0)
     ebit = gross_profit - annual_var_costs - annual_fixed_opex - annual_depreciation
     daily_cogs = annual_cogs / 365
-    daily_poha_production = annual_poha / (inputs['days_per_month'] * 12)
-    daily_prod_cost = (annual_cogs + annual_var_costs) / annual_poha if annual_poha > 0 else 0
+    daily_poha_production = annual_poha / operating_days
+    daily_prod_cost = _guarded_div(annual_cogs + annual_var_costs, annual_poha, annual_poha > 0)
     daily_rev = annual_revenue / 365
-    rm_inventory = daily_cogs * inputs['rm_inventory_days']
-    fg_inventory = (daily_poha_production * daily_prod_cost) * inputs['fg_inventory_days']
-    receivables = daily_rev * inputs['debtor_days']
-    payables = daily_cogs * inputs['creditor_days']
+    rm_inventory = daily_cogs * rm_inventory_days
+    fg_inventory = (daily_poha_production * daily_prod_cost) * fg_inventory_days
+    receivables = daily_rev * debtor_days
+    payables = daily_cogs * creditor_days
     current_assets = rm_inventory + fg_inventory + receivables
-    interest_fixed = (total_capex * (1 - inputs['equity_contrib'] / 100)) * (inputs['interest_rate'] / 100)
+    interest_fixed = (total_capex * (1 - equity_contrib / 100)) * (interest_rate / 100)
     net_working_capital = current_assets - payables
-    interest_wc = max(0, net_working_capital) * (inputs['interest_rate'] / 100)
+    interest_wc = np.maximum(0, net_working_capital) * (interest_rate / 100)
     total_interest = interest_fixed + interest_wc
     ebt = ebit - total_interest
-    taxes = max(0, ebt) * (inputs['tax_rate_percent'] / 100)
+    taxes = np.maximum(0, ebt) * (tax_rate_percent / 100)
     net_profit = ebt - taxes
-    equity = total_capex * (inputs['equity_contrib'] / 100)
+    equity = total_capex * (equity_contrib / 100)
     debt = total_capex - equity
     capital_employed = total_capex + net_working_capital
-    roce = (ebit / capital_employed) * 100 if capital_employed != 0 else float('inf')
-    net_profit_margin = (net_profit / annual_revenue) * 100 if annual_revenue > 0 else 0
+    roce = _guarded_div(ebit, capital_employed, capital_employed != 0, np.inf) * 100
+    net_profit_margin = _guarded_div(net_profit, annual_revenue, annual_revenue > 0) * 100
     ebitda = ebit + annual_depreciation
-    ebitda_margin = (ebitda / annual_revenue) * 100 if annual_revenue > 0 else 0
-    roe = (net_profit / equity) * 100 if equity > 0 else float('inf')
-    gross_margin = (gross_profit / annual_revenue) * 100 if annual_revenue > 0 else 0
+    ebitda_margin = _guarded_div(ebitda, annual_revenue, annual_revenue > 0) * 100
+    roe = _guarded_div(net_profit, equity, equity > 0, np.inf) * 100
+    gross_margin = _guarded_div(gross_profit, annual_revenue, annual_revenue > 0) * 100
     contribution_margin = annual_revenue - annual_cogs - annual_var_costs
-    contribution_margin_pct = (contribution_margin / annual_revenue) * 100 if annual_revenue > 0 else 0
-    return {**inputs, 'total_capex': total_capex, 'daily_paddy': daily_paddy, 'annual_paddy': annual_paddy, 'annual_poha': annual_poha, 'daily_byproduct_gen': daily_byproduct_gen, 'daily_byproduct_sold': daily_byproduct_sold, 'annual_byproduct_sold': annual_byproduct_sold, 'daily_byproduct_target': daily_byproduct_target, 'byproduct_limit_hit': byproduct_limit_hit, 'annual_revenue': annual_revenue, 'annual_poha_revenue': annual_poha_revenue, 'annual_byproduct_revenue': annual_byproduct_revenue, 'annual_cogs': annual_cogs, 'gross_profit': gross_profit, 'annual_var_costs': annual_var_costs, 'annual_fixed_opex': annual_fixed_opex, 'annual_depreciation': annual_depreciation, 'ebit': ebit, 'net_working_capital': net_working_capital, 'equity': equity, 'debt': debt, 'total_interest': total_interest, 'ebt': ebt, 'taxes': taxes, 'net_profit': net_profit, 'roce': roce, 'net_profit_margin': net_profit_margin, 'ebitda': ebitda, 'ebitda_margin': ebitda_margin, 'roe': roe, 'gross_margin': gross_margin, 'contribution_margin': contribution_margin, 'contribution_margin_pct': contribution_margin_pct, 'total_var_cost_per_kg': var_cost_per_kg, 'rm_inventory': rm_inventory, 'fg_inventory': fg_inventory, 'receivables': receivables, 'payables': payables, 'current_assets': current_assets, 'capital_employed': capital_employed, 'total_assets': total_capex + current_assets, 'daily_cogs': daily_cogs, 'daily_prod_cost': daily_prod_cost, 'daily_rev': daily_rev, 'interest_fixed': interest_fixed, 'interest_wc': interest_wc}
+    contribution_margin_pct = _guarded_div(contribution_margin, annual_revenue, annual_revenue > 0) * 100
+    return {'operating_days': operating_days, 'total_capex': total_capex, 'daily_paddy': daily_paddy, 'annual_paddy': annual_paddy, 'annual_poha': annual_poha, 'daily_byproduct_gen': daily_byproduct_gen, 'monthly_byproduct_gen': monthly_byproduct_gen, 'annual_byproduct_gen': annual_byproduct_gen, 'daily_byproduct_sold': daily_byproduct_sold, 'annual_byproduct_sold': annual_byproduct_sold, 'daily_byproduct_target': daily_byproduct_target, 'byproduct_limit_hit': byproduct_limit_hit, 'annual_revenue': annual_revenue, 'annual_poha_revenue': annual_poha_revenue, 'annual_byproduct_revenue': annual_byproduct_revenue, 'annual_cogs': annual_cogs, 'gross_profit': gross_profit, 'annual_var_costs': annual_var_costs, 'annual_fixed_opex': annual_fixed_opex, 'annual_depreciation': annual_depreciation, 'ebit': ebit, 'net_working_capital': net_working_capital, 'equity': equity, 'debt': debt, 'total_interest': total_interest, 'ebt': ebt, 'taxes': taxes, 'net_profit': net_profit, 'roce': roce, 'net_profit_margin': net_profit_margin, 'ebitda': ebitda, 'ebitda_margin': ebitda_margin, 'roe': roe, 'gross_margin': gross_margin, 'contribution_margin': contribution_margin, 'contribution_margin_pct': contribution_margin_pct, 'total_var_cost_per_kg': var_cost_per_kg, 'rm_inventory': rm_inventory, 'fg_inventory': fg_inventory, 'receivables': receivables, 'payables': payables, 'current_assets': current_assets, 'capital_employed': capital_employed, 'total_assets': total_capex + current_assets, 'daily_cogs': daily_cogs, 'daily_prod_cost': daily_prod_cost, 'daily_rev': daily_rev, 'interest_fixed': interest_fixed, 'interest_wc': interest_wc}
+
+# Part of every cached builder's key; bump when _financials_core, the breakdown
+# templates or the table specs change so stale cache entries are not reused
+_MODEL_VERSION = 1
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _calc_financials(model_version, items):
+    inputs = dict(items)
+    if not _inputs_valid(inputs): return {'error': 'Invalid inputs: Yield, Price, and Capex must be > 0'}
+    return {k: np.asarray(v).item() for k, v in _financials_core(**inputs).items()}
+
+def calculate_financials(inputs):
+    return _calc_financials(_MODEL_VERSION, tuple(sorted(inputs.items())))
+
+def calculate_net_profit_sweep(inputs, var_key, values):
+    # Net profit with `var_key` swept over `values`; NaN where the inputs are invalid
+    sweep_inputs = {**inputs, var_key: values}
+    return np.where(_inputs_valid(sweep_inputs), _financials_core(**sweep_inputs)['net_profit'], np.nan)
 
 # --- Reusable Metric Component ---
-def custom_metric(col, label, value, sub_value, info_key):
-    formula, explanation = RATIOS_INFO[info_key].values()
-    color = 'green' if (isinstance(sub_value, (int, float)) and sub_value >= 0) or ('Margin' not in str(sub_value) and str(sub_value) != "") else 'red'
-    with col: st.markdown(f"""<div class="metric-container"><div class="tooltip"><div class="metric-title">{label} ℹ️</div><span class="tooltiptext"><strong>Formula:</strong> {formula}<br><strong>Explanation:</strong> {explanation}</span></div><div class="metric-value">{value}</div><div class="metric-delta" style="color: {color};">{sub_value}</div></div>""", unsafe_allow_html=True)
+def custom_metric_html(label, value, sub_value, info_key, numeric_value=0):
+    # `numeric_value` is the raw number behind `sub_value`; its sign alone picks the delta colour
+    color = 'green' if numeric_value >= 0 else 'red'
+    return f"""<div class="metric-container"><div class="tooltip"><div class="metric-title">{label} ℹ️</div>{_METRIC_TOOLTIPS[info_key]}</div><div class="metric-value">{value}</div><div class="metric-delta" style="color: {color};">{sub_value}</div></div>"""
+
+def render_metric_grid(*cards):
+    st.markdown(f"""<div class="kpi-grid">{''.join(cards)}</div>""", unsafe_allow_html=True)
 
 # --- Detailed Breakdowns Rendering Function ---
-def render_detailed_breakdowns(results):
+# Expander bodies as str.format_map templates
+_REVENUE_BREAKDOWN = """
+<p>Total revenue is the sum of income from selling the primary product (Poha) and any byproducts.</p>
+<strong>1. Poha Revenue:</strong>
+<ul>
+    <li><b>Calculation:</b> Annual Poha Production ({annual_poha}) &times; Poha Price per kg ({poha_price}) = <b>{annual_poha_revenue}</b></li>
+</ul>
+<strong>2. Byproduct Revenue:</strong>
+<ul>
+    <li><b>Calculation:</b> Annual Byproduct Sold ({annual_byproduct_sold}) &times; Byproduct Price per kg ({byproduct_rate_kg}) = <b>{annual_byproduct_revenue}</b></li>
+</ul>
+<strong>3. Final Calculation:</strong>
+<ul>
+    <li><b>Total Annual Revenue:</b> Poha Revenue ({annual_poha_revenue}) + Byproduct Revenue ({annual_byproduct_revenue}) = <b>{annual_revenue}</b></li>
+</ul>
+"""
+_WORKING_CAPITAL_BREAKDOWN = """
+<p>Working capital is the cash needed to fund day-to-day operations. It's calculated by subtracting operating current liabilities from operating current assets.</p>
+<strong>1. Calculate Current Assets (Money tied up in operations):</strong>
+<ul>
+    <li><b>Raw Material Inventory:</b> Daily COGS ({daily_cogs}) &times; {rm_inventory_days} days = <b>{rm_inventory}</b></li>
+    <li><b>Finished Goods Inventory:</b> Daily Production Cost ({daily_prod_cost}) &times; {fg_inventory_days} days = <b>{fg_inventory}</b></li>
+    <li><b>Accounts Receivable:</b> Daily Revenue ({daily_rev}) &times; {debtor_days} days = <b>{receivables}</b></li>
+    <li><b>Total Current Assets:</b> {rm_inventory} + {fg_inventory} + {receivables} = <b>{current_assets}</b></li>
+</ul>
+<strong>2. Calculate Current Liabilities (Credit received from suppliers):</strong>
+<ul>
+    <li><b>Accounts Payable:</b> Daily COGS ({daily_cogs}) &times; {creditor_days} days = <b>{payables}</b></li>
+</ul>
+<strong>3. Final Calculation:</strong>
+<ul>
+    <li><b>Net Working Capital (NWC):</b> Total Current Assets ({current_assets}) - Accounts Payable ({payables}) = <b>{net_working_capital}</b></li>
+</ul>
+"""
+_INTEREST_BREAKDOWN = """
+<p>Interest is calculated on both the term loan for capital assets (CAPEX) and the loan required for working capital.</p>
+<strong>1. Interest on Term Loan (CAPEX Loan):</strong>
+<ul>
+    <li><b>Total Debt:</b> Total CAPEX ({total_capex}) &times; (100% - {equity_contrib}% Equity) = <b>{debt}</b></li>
+    <li><b>Interest on Debt:</b> {debt} &times; {interest_rate}% = <b>{interest_fixed}</b></li>
+</ul>
+<strong>2. Interest on Working Capital Loan:</strong>
+<ul>
+    <li><b>Interest on NWC:</b> Net Working Capital ({net_working_capital}) &times; {interest_rate}% = <b>{interest_wc}</b></li>
+</ul>
+<strong>3. Final Calculation:</strong>
+<ul>
+    <li><b>Total Annual Interest:</b> Interest on Debt ({interest_fixed}) + Interest on NWC ({interest_wc}) = <b>{total_interest}</b></li>
+</ul>
+"""
+_ROCE_BREAKDOWN = """
+<p>ROCE measures how efficiently a company is using its capital to generate profits.</p>
+<strong>1. Calculate Capital Employed:</strong>
+<ul>
+    <li><b>Total CAPEX:</b> Sum of Land, Civil, and Machinery costs = <b>{total_capex}</b></li>
+    <li><b>Net Working Capital (NWC):</b> (Calculated above) = <b>{net_working_capital}</b></li>
+    <li><b>Total Capital Employed:</b> Total CAPEX ({total_capex}) + NWC ({net_working_capital}) = <b>{capital_employed}</b></li>
+</ul>
+<strong>2. Calculate EBIT (Earnings Before Interest & Tax):</strong>
+<ul>
+    <li><b>EBIT:</b> (See P&L Statement) = <b>{ebit}</b></li>
+</ul>
+<strong>3. Final Calculation:</strong>
+<ul>
+    <li><b>ROCE:</b> (EBIT / Capital Employed) &times; 100 = ({ebit} / {capital_employed}) &times; 100 = <b>{roce:.2f}%</b></li>
+</ul>
+"""
+_BREAKDOWN_CURRENCY_KEYS = ('annual_poha', 'poha_price', 'annual_poha_revenue', 'annual_byproduct_sold', 'byproduct_rate_kg', 'annual_byproduct_revenue', 'annual_revenue', 'daily_cogs', 'rm_inventory', 'daily_prod_cost', 'fg_inventory', 'daily_rev', 'receivables', 'current_assets', 'payables', 'net_working_capital', 'total_capex', 'debt', 'interest_fixed', 'interest_wc', 'total_interest', 'capital_employed', 'ebit')
+# Template fields read straight from the sidebar inputs; everything else comes from the computed results
+_BREAKDOWN_INPUT_KEYS = ('poha_price', 'byproduct_rate_kg', 'rm_inventory_days', 'fg_inventory_days', 'debtor_days', 'creditor_days', 'equity_contrib', 'interest_rate')
+_BREAKDOWN_RESULT_KEYS = tuple(k for k in _BREAKDOWN_CURRENCY_KEYS if k not in _BREAKDOWN_INPUT_KEYS) + ('roce',)
+_BREAKDOWNS = (("Revenue Calculation (Annual)", _REVENUE_BREAKDOWN), ("Working Capital Calculation", _WORKING_CAPITAL_BREAKDOWN), ("Interest Cost Calculation (Annual)", _INTEREST_BREAKDOWN), ("Return on Capital Employed (ROCE) Calculation", _ROCE_BREAKDOWN))
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _build_breakdowns(model_version, figures):
+    # `figures` holds (key, value) pairs for the template fields
+    values = dict(figures)
+    values.update((k, format_currency(values[k])) for k in _BREAKDOWN_CURRENCY_KEYS)
+    return tuple(template.format_map(values) for _, template in _BREAKDOWNS)
+
+@st.fragment
+def render_detailed_breakdowns(inputs, results):
     st.header("🔍 Detailed Calculation Breakdowns")
+    if not st.checkbox("Show detailed calculations", value=False): return
+    bodies = _build_breakdowns(_MODEL_VERSION, tuple((k, inputs[k]) for k in _BREAKDOWN_INPUT_KEYS) + tuple((k, results[k]) for k in _BREAKDOWN_RESULT_KEYS))
+    for (title, _), body in zip(_BREAKDOWNS, bodies):
+        with st.expander(title): st.markdown(body, unsafe_allow_html=True)
 
-    with st.expander("Revenue Calculation (Annual)"):
-        st.markdown(f"""
-        <p>Total revenue is the sum of income from selling the primary product (Poha) and any byproducts.</p>
-        <strong>1. Poha Revenue:</strong>
-        <ul>
-            <li><b>Calculation:</b> Annual Poha Production ({format_currency(results['annual_poha'])}) &times; Poha Price per kg ({format_currency(results['poha_price'])}) = <b>{format_currency(results['annual_poha_revenue'])}</b></li>
-        </ul>
-        <strong>2. Byproduct Revenue:</strong>
-        <ul>
-            <li><b>Calculation:</b> Annual Byproduct Sold ({format_currency(results['annual_byproduct_sold'])}) &times; Byproduct Price per kg ({format_currency(results['byproduct_rate_kg'])}) = <b>{format_currency(results['annual_byproduct_revenue'])}</b></li>
-        </ul>
-        <strong>3. Final Calculation:</strong>
-        <ul>
-            <li><b>Total Annual Revenue:</b> Poha Revenue ({format_currency(results['annual_poha_revenue'])}) + Byproduct Revenue ({format_currency(results['annual_byproduct_revenue'])}) = <b>{format_currency(results['annual_revenue'])}</b></li>
-        </ul>
-        """, unsafe_allow_html=True)
-
-    with st.expander("Working Capital Calculation"):
-        st.markdown(f"""
-        <p>Working capital is the cash needed to fund day-to-day operations. It's calculated by subtracting operating current liabilities from operating current assets.</p>
-        <strong>1. Calculate Current Assets (Money tied up in operations):</strong>
-        <ul>
-            <li><b>Raw Material Inventory:</b> Daily COGS ({format_currency(results['daily_cogs'])}) &times; {results['rm_inventory_days']} days = <b>{format_currency(results['rm_inventory'])}</b></li>
-            <li><b>Finished Goods Inventory:</b> Daily Production Cost ({format_currency(results['daily_prod_cost'])}) &times; {results['fg_inventory_days']} days = <b>{format_currency(results['fg_inventory'])}</b></li>
-            <li><b>Accounts Receivable:</b> Daily Revenue ({format_currency(results['daily_rev'])}) &times; {results['debtor_days']} days = <b>{format_currency(results['receivables'])}</b></li>
-            <li><b>Total Current Assets:</b> {format_currency(results['rm_inventory'])} + {format_currency(results['fg_inventory'])} + {format_currency(results['receivables'])} = <b>{format_currency(results['current_assets'])}</b></li>
-        </ul>
-        <strong>2. Calculate Current Liabilities (Credit received from suppliers):</strong>
-        <ul>
-            <li><b>Accounts Payable:</b> Daily COGS ({format_currency(results['daily_cogs'])}) &times; {results['creditor_days']} days = <b>{format_currency(results['payables'])}</b></li>
-        </ul>
-        <strong>3. Final Calculation:</strong>
-        <ul>
-            <li><b>Net Working Capital (NWC):</b> Total Current Assets ({format_currency(results['current_assets'])}) - Accounts Payable ({format_currency(results['payables'])}) = <b>{format_currency(results['net_working_capital'])}</b></li>
-        </ul>
-        """, unsafe_allow_html=True)
-
-    with st.expander("Interest Cost Calculation (Annual)"):
-        st.markdown(f"""
-        <p>Interest is calculated on both the term loan for capital assets (CAPEX) and the loan required for working capital.</p>
-        <strong>1. Interest on Term Loan (CAPEX Loan):</strong>
-        <ul>
-            <li><b>Total Debt:</b> Total CAPEX ({format_currency(results['total_capex'])}) &times; (100% - {results['equity_contrib']}% Equity) = <b>{format_currency(results['debt'])}</b></li>
-            <li><b>Interest on Debt:</b> {format_currency(results['debt'])} &times; {results['interest_rate']}% = <b>{format_currency(results['interest_fixed'])}</b></li>
-        </ul>
-        <strong>2. Interest on Working Capital Loan:</strong>
-        <ul>
-            <li><b>Interest on NWC:</b> Net Working Capital ({format_currency(results['net_working_capital'])}) &times; {results['interest_rate']}% = <b>{format_currency(results['interest_wc'])}</b></li>
-        </ul>
-        <strong>3. Final Calculation:</strong>
-        <ul>
-            <li><b>Total Annual Interest:</b> Interest on Debt ({format_currency(results['interest_fixed'])}) + Interest on NWC ({format_currency(results['interest_wc'])}) = <b>{format_currency(results['total_interest'])}</b></li>
-        </ul>
-        """, unsafe_allow_html=True)
-    
-    with st.expander("Return on Capital Employed (ROCE) Calculation"):
-        st.markdown(f"""
-        <p>ROCE measures how efficiently a company is using its capital to generate profits.</p>
-        <strong>1. Calculate Capital Employed:</strong>
-        <ul>
-            <li><b>Total CAPEX:</b> Sum of Land, Civil, and Machinery costs = <b>{format_currency(results['total_capex'])}</b></li>
-            <li><b>Net Working Capital (NWC):</b> (Calculated above) = <b>{format_currency(results['net_working_capital'])}</b></li>
-            <li><b>Total Capital Employed:</b> Total CAPEX ({format_currency(results['total_capex'])}) + NWC ({format_currency(results['net_working_capital'])}) = <b>{format_currency(results['capital_employed'])}</b></li>
-        </ul>
-        <strong>2. Calculate EBIT (Earnings Before Interest & Tax):</strong>
-        <ul>
-            <li><b>EBIT:</b> (See P&L Statement) = <b>{format_currency(results['ebit'])}</b></li>
-        </ul>
-        <strong>3. Final Calculation:</strong>
-        <ul>
-            <li><b>ROCE:</b> (EBIT / Capital Employed) &times; 100 = ({format_currency(results['ebit'])} / {format_currency(results['capital_employed'])}) &times; 100 = <b>{results['roce']:.2f}%</b></li>
-        </ul>
-        """, unsafe_allow_html=True)
+# --- Cached Table Builders ---
+_SUMMARY_METRICS = ("Paddy Consumption (kg)", "Poha Production (kg)", "Byproduct Generated (kg)", "Byproduct Sold (kg)", "Total Revenue", "COGS", "Gross Profit")
+_SUMMARY_FORMATTERS = ("{:,.0f}".format,) * 4 + (format_currency,) * 3
+_SUMMARY_KEYS = ('annual_paddy', 'annual_poha', 'annual_byproduct_gen', 'annual_byproduct_sold', 'annual_revenue', 'annual_cogs', 'gross_profit')
+# (label, results key, shown as a deduction in brackets)
+_PNL_ROWS = (("Total Revenue", 'annual_revenue', False), ("COGS", 'annual_cogs', True), ("**Gross Profit**", 'gross_profit', False), ("Variable OpEx", 'annual_var_costs', True), ("Fixed OpEx", 'annual_fixed_opex', True), ("Depreciation", 'annual_depreciation', True), ("**EBIT**", 'ebit', False), ("Total Interest", 'total_interest', True), ("**EBT**", 'ebt', False), ("Taxes", 'taxes', True), ("**Net Profit (PAT)**", 'net_profit', False))
+_BS_ROWS = (("Total Capex", 'total_capex', False), ("Equity", 'equity', False), ("Debt", 'debt', False), ("**Total Assets**", 'total_assets', False), ("RM Inventory", 'rm_inventory', False), ("FG Inventory", 'fg_inventory', False), ("Receivables", 'receivables', False), ("Payables", 'payables', True), ("**Net Working Capital**", 'net_working_capital', False), ("**Capital Employed**", 'capital_employed', False))
+_PNL_COLUMN_CONFIG = {"Metric": st.column_config.Column(width="medium"), "Amount (INR)": st.column_config.Column(width="small")}
+_BS_COLUMN_CONFIG = {"Item": st.column_config.Column(width="medium"), "Amount (INR)": st.column_config.Column(width="small")}
 
-# --- Main Dashboard Rendering ---
-def render_dashboard(inputs):
-    results = calculate_financials(inputs)
-    if 'error' in results: st.error(results['error']); return
-    if results['byproduct_limit_hit']: st.markdown(f"""<div class="warning-box"><strong>⚠️ Byproduct Constraint:</strong> Trying to sell {results['byproduct_sale_percent']:.1f}% ({results['daily_byproduct_target']:,.0f} kg/day) but only {results['daily_byproduct_gen']:,.0f} kg/day is generated. <br><strong>Suggestion:</strong> Reduce 'Byproduct Sale %' in the sidebar to be less than the available amount.</div>""", unsafe_allow_html=True)
+def _fmt_html_table(data):
+    # Static HTML table from a dict of equal-length, pre-formatted columns
+    header = ''.join(f"<th>{col}</th>" for col in data)
+    body = ''.join("<tr>" + ''.join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in zip(*data.values()))
+    return f'<table class="summary-table"><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>'
+
+# Builders take a tuple of just the figures each table shows, in row order
+@st.cache_data(max_entries=256, show_spinner=False)
+def _build_summary_table(model_version, annuals, operating_days):
+    # Quantities scale by operating days, money by 365
+    scaled = np.array(annuals)[:, None] / np.array([[operating_days, 12, 1]] * 4 + [[365, 12, 1]] * 3)
+    return _fmt_html_table({"Metric": list(_SUMMARY_METRICS), **{col: [fmt(v) for fmt, v in zip(_SUMMARY_FORMATTERS, vals)] for col, vals in zip(("Daily", "Monthly", "Annual"), scaled.T.tolist())}})
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _build_statement_df(model_version, rows, first_col, amounts):
+    return pd.DataFrame([(label, f"({format_currency(v)})" if deduction else format_currency(v)) for (label, _, deduction), v in zip(rows, amounts)], columns=[first_col, "Amount (INR)"])
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _build_sensitivity_df(model_version, items, var_key, label, low_pct, high_pct):
+    inputs = dict(items)
+    base_val = inputs[var_key]
+    range_vals = np.linspace(base_val * (1 + low_pct / 100), base_val * (1 + high_pct / 100), 11)
+    net_profit = calculate_net_profit_sweep(inputs, var_key, range_vals)
+    df = pd.DataFrame({label: range_vals, "Net Profit": net_profit})
+    return df.dropna() if np.isnan(net_profit).any() else df
+
+# --- Dashboard Sections ---
+_BREAKEVEN_METRICS = ("EBITDA", "Net Profit (PAT)")
+# Sensitivity selector label -> input key swept, and the matching table formats per label
+_SENSITIVITY_VARS = {"Poha Selling Price": 'poha_price', "Paddy Purchase Rate": 'paddy_rate', "Paddy to Poha Yield": 'paddy_yield', "Interest Rate": 'interest_rate'}
+_SENSITIVITY_OPTIONS = tuple(_SENSITIVITY_VARS)
+_SENSITIVITY_COLUMN_CONFIGS = {label: {label: st.column_config.NumberColumn(format="%,.2f"), "Net Profit": st.column_config.NumberColumn(format="%,.0f")} for label in _SENSITIVITY_VARS}
+
+def render_kpis(results):
     st.header("📈 Key Performance Indicators")
-    row1_col1, row1_col2, row1_col3 = st.columns(3)
-    custom_metric(row1_col1, "Annual Revenue", format_currency(results['annual_revenue']), "", "Revenue")
-    custom_metric(row1_col2, "Annual COGS", format_currency(results['annual_cogs']), "", "COGS")
-    custom_metric(row1_col3, "Gross Margin", f"{results['gross_margin']:.1f}%", format_currency(results['gross_profit']), "Gross Margin")
-    row2_col1, row2_col2, row2_col3 = st.columns(3)
-    custom_metric(row2_col1, "Contribution Margin", f"{results['contribution_margin_pct']:.1f}%", format_currency(results['contribution_margin']), "Contribution Margin")
-    custom_metric(row2_col2, "Net Profit (PAT)", format_currency(results['net_profit']), f"{results['net_profit_margin']:.1f}% Margin", "Net Profit")
-    custom_metric(row2_col3, "EBITDA", format_currency(results['ebitda']), f"{results['ebitda_margin']:.1f}% Margin", "EBITDA")
-    row3_col1, row3_col2, _ = st.columns(3)
-    custom_metric(row3_col1, "ROCE", f"{results['roce']:.1f}%", "", "ROCE")
-    custom_metric(row3_col2, "ROE", f"{results['roe']:.1f}%", "", "ROE")
-    st.divider()
-    st.header("📊 Production & Financial Summary")
-    summary_data = {"Metric": ["Paddy Consumption (kg)", "Poha Production (kg)", "Byproduct Generated (kg)", "Byproduct Sold (kg)", "Total Revenue", "COGS", "Gross Profit"], "Daily": [f"{results['daily_paddy']:,.0f}", f"{results['annual_poha']/(results['days_per_month']*12):,.0f}", f"{results['daily_byproduct_gen']:,.0f}", f"{results['daily_byproduct_sold']:,.0f}", format_currency(results['annual_revenue']/365), format_currency(results['annual_cogs']/365), format_currency(results['gross_profit']/365)], "Monthly": [f"{results['daily_paddy']*results['days_per_month']:,.0f}", f"{results['annual_poha']/12:,.0f}", f"{results['daily_byproduct_gen']*results['days_per_month']:,.0f}", f"{results['daily_byproduct_sold']*results['days_per_month']:,.0f}", format_currency(results['annual_revenue']/12), format_currency(results['annual_cogs']/12), format_currency(results['gross_profit']/12)], "Annual": [f"{results['annual_paddy']:,.0f}", f"{results['annual_poha']:,.0f}", f"{results['daily_byproduct_gen']*results['days_per_month']*12:,.0f}", f"{results['annual_byproduct_sold']:,.0f}", format_currency(results['annual_revenue']), format_currency(results['annual_cogs']), format_currency(results['gross_profit'])]}
-    st.dataframe(pd.DataFrame(summary_data), hide_index=True, use_container_width=True, column_config={"Metric": st.column_config.Column(width="medium"), "Daily": st.column_config.Column(width="small"), "Monthly": st.column_config.Column(width="small"), "Annual": st.column_config.Column(width="small")})
-    st.divider()
+    render_metric_grid(
+        custom_metric_html("Annual Revenue", format_currency(results['annual_revenue']), "", "Revenue"),
+        custom_metric_html("Annual COGS", format_currency(results['annual_cogs']), "", "COGS"),
+        custom_metric_html("Gross Margin", f"{results['gross_margin']:.1f}%", format_currency(results['gross_profit']), "Gross Margin", results['gross_profit']),
+        custom_metric_html("Contribution Margin", f"{results['contribution_margin_pct']:.1f}%", format_currency(results['contribution_margin']), "Contribution Margin", results['contribution_margin']),
+        custom_metric_html("Net Profit (PAT)", format_currency(results['net_profit']), f"{results['net_profit_margin']:.1f}% Margin", "Net Profit", results['net_profit']),
+        custom_metric_html("EBITDA", format_currency(results['ebitda']), f"{results['ebitda_margin']:.1f}% Margin", "EBITDA", results['ebitda']),
+        custom_metric_html("ROCE", f"{results['roce']:.1f}%", "", "ROCE"),
+        custom_metric_html("ROE", f"{results['roe']:.1f}%", "", "ROE"))
+
+@st.fragment
+def render_breakeven(inputs, results):
+    import plotly.graph_objects as go
     st.header("💡 Breakeven Analysis")
     col_be_select, _ = st.columns([1, 2])
-    with col_be_select: breakeven_metric = st.selectbox("Select Breakeven Metric:", ["EBITDA", "Net Profit (PAT)"])
-    rm_cost = results['paddy_rate']
+    with col_be_select: breakeven_metric = st.selectbox("Select Breakeven Metric:", _BREAKEVEN_METRICS)
+    rm_cost = inputs['paddy_rate']
     total_var_cost = rm_cost + results['total_var_cost_per_kg']
-    poha_rev = results['poha_price'] * (results['paddy_yield'] / 100)
-    byproduct_rev = results['byproduct_rate_kg'] * min(results['byproduct_sale_percent'] / 100, (100 - results['paddy_yield']) / 100)
+    yield_frac = inputs['paddy_yield'] / 100
+    poha_rev = inputs['poha_price'] * yield_frac
+    byproduct_rev = inputs['byproduct_rate_kg'] * min(inputs['byproduct_sale_percent'] / 100, 1 - yield_frac)
     rev_per_kg = poha_rev + byproduct_rev
     contribution_per_kg = rev_per_kg - total_var_cost
     if breakeven_metric == "EBITDA": fixed_costs, target_metric = results['annual_fixed_opex'], "EBITDA"
@@ -308,52 +407,57 @@ def render_dashboard(inputs):
         st.metric("Breakeven Revenue", format_currency(breakeven_vol * rev_per_kg if breakeven_vol != float('inf') else 0))
     with col_be2:
         max_vol = max(results['annual_paddy'], breakeven_vol) * 1.5 if breakeven_vol != float('inf') else results['annual_paddy'] * 1.5
-        volumes = np.linspace(0, max_vol, 100)
+        volumes = np.array([0.0, max_vol])
         revenue_line, cost_line = volumes * rev_per_kg, fixed_costs + (volumes * total_var_cost)
-        be_df = pd.DataFrame({'Paddy Volume (kg)': volumes, 'Total Revenue': revenue_line, 'Total Costs': cost_line})
-        fig = px.line(be_df, x='Paddy Volume (kg)', y=['Total Revenue', 'Total Costs'], title=f"Breakeven Analysis - {target_metric}")
-        if breakeven_vol != float('inf') and breakeven_vol < max_vol: fig.add_vline(x=breakeven_vol, line_dash="dash", line_color="red", annotation_text="Breakeven")
-        st.plotly_chart(fig, use_container_width=True)
-    st.divider()
+        fig = go.Figure([go.Scattergl(x=volumes, y=revenue_line, mode='lines', name='Total Revenue'), go.Scattergl(x=volumes, y=cost_line, mode='lines', name='Total Costs')])
+        fig.update_layout(title=f"Breakeven Analysis - {target_metric}", xaxis_title='Paddy Volume (kg)')
+        if breakeven_vol != float('inf') and breakeven_vol < max_vol:
+            fig.update_layout(shapes=[dict(type='line', x0=breakeven_vol, x1=breakeven_vol, y0=0, y1=1, yref='paper', line=dict(color='red', dash='dash'))], annotations=[dict(x=breakeven_vol, y=1, yref='paper', text="Breakeven", showarrow=False, xanchor='left', yanchor='top')])
+        st.plotly_chart(fig, use_container_width=True, key="breakeven_chart", config={'staticPlot': True, 'displayModeBar': False})
 
-    # --- SENSITIVITY ANALYSIS ---
+@st.fragment
+def render_sensitivity(inputs):
+    import plotly.graph_objects as go
     st.header("🔬 Sensitivity Analysis")
-    var_options = ("Poha Selling Price", "Paddy Purchase Rate", "Paddy to Poha Yield", "Interest Rate")
-    sensitivity_var = st.selectbox("Variable to analyze:", var_options)
+    sensitivity_var = st.selectbox("Variable to analyze:", _SENSITIVITY_OPTIONS)
     sensitivity_range = st.slider("Sensitivity range (% change from base value):", -50, 50, (-20, 20))
-    
-    var_key = {"Poha Selling Price": 'poha_price', "Paddy Purchase Rate": 'paddy_rate', "Paddy to Poha Yield": 'paddy_yield', "Interest Rate": 'interest_rate'}[sensitivity_var]
-    base_val = inputs[var_key]
-    range_vals = np.linspace(base_val * (1 + sensitivity_range[0] / 100), base_val * (1 + sensitivity_range[1] / 100), 11)
-    
-    sens_data = []
-    for val in range_vals:
-        res = calculate_financials({**inputs, var_key: val})
-        sens_data.append({sensitivity_var: val, "Net Profit": res.get('net_profit', np.nan)})
-    
-    sens_df = pd.DataFrame(sens_data).dropna()
+
+    var_key = _SENSITIVITY_VARS[sensitivity_var]
+    sens_df = _build_sensitivity_df(_MODEL_VERSION, tuple(sorted(inputs.items())), var_key, sensitivity_var, *sensitivity_range)
     col_sens1, col_sens2 = st.columns([1, 1.5])
     with col_sens1:
-        st.dataframe(sens_df.style.format({sensitivity_var: '{:,.2f}', 'Net Profit': '{:,.0f}'}), use_container_width=True, hide_index=True)
+        st.dataframe(sens_df, use_container_width=True, hide_index=True, column_config=_SENSITIVITY_COLUMN_CONFIGS[sensitivity_var])
     with col_sens2:
         if not sens_df.empty:
-            fig_sens = px.line(sens_df, x=sensitivity_var, y='Net Profit', title=f"Impact of {sensitivity_var} on Net Profit", markers=True, labels={'Net Profit': 'Net Profit (₹)', sensitivity_var: f'Value of {sensitivity_var}'})
-            fig_sens.update_traces(marker=dict(size=8), line=dict(width=3))
-            st.plotly_chart(fig_sens, use_container_width=True)
-    st.divider()
-    
+            fig_sens = go.Figure(go.Scattergl(x=sens_df[sensitivity_var].to_numpy(), y=sens_df['Net Profit'].to_numpy(), mode='lines+markers', marker=dict(size=8), line=dict(width=3)), layout=go.Layout(title=f"Impact of {sensitivity_var} on Net Profit", xaxis_title=f'Value of {sensitivity_var}', yaxis_title='Net Profit (₹)'))
+            st.plotly_chart(fig_sens, use_container_width=True, key="sensitivity_chart")
+
+def render_financial_statements(results):
     col_pnl, col_bs = st.columns([1.2, 1])
     with col_pnl:
         st.header("💰 Profit & Loss Statement (Annual)")
-        pnl_data = {"Metric": ["Total Revenue", "COGS", "**Gross Profit**", "Variable OpEx", "Fixed OpEx", "Depreciation", "**EBIT**", "Total Interest", "**EBT**", "Taxes", "**Net Profit (PAT)**"], "Amount (INR)": [format_currency(results['annual_revenue']), f"({format_currency(results['annual_cogs'])})", format_currency(results['gross_profit']), f"({format_currency(results['annual_var_costs'])})", f"({format_currency(results['annual_fixed_opex'])})", f"({format_currency(results['annual_depreciation'])})", format_currency(results['ebit']), f"({format_currency(results['total_interest'])})", format_currency(results['ebt']), f"({format_currency(results['taxes'])})", format_currency(results['net_profit'])]}
-        pnl_df = pd.DataFrame(pnl_data)
-        st.dataframe(pnl_df, hide_index=True, use_container_width=True, column_config={"Metric": st.column_config.Column(width="medium"), "Amount (INR)": st.column_config.Column(width="small")})
+        st.dataframe(_build_statement_df(_MODEL_VERSION, _PNL_ROWS, "Metric", tuple(results[key] for _, key, _ in _PNL_ROWS)), hide_index=True, use_container_width=True, column_config=_PNL_COLUMN_CONFIG)
     with col_bs:
         st.header("💼 Balance Sheet")
-        bs_data = {"Item": ["Total Capex", "Equity", "Debt", "**Total Assets**", "RM Inventory", "FG Inventory", "Receivables", "Payables", "**Net Working Capital**", "**Capital Employed**"], "Amount (INR)": [format_currency(results['total_capex']), format_currency(results['equity']), format_currency(results['debt']), format_currency(results['total_assets']), format_currency(results['rm_inventory']), format_currency(results['fg_inventory']), format_currency(results['receivables']), f"({format_currency(results['payables'])})", format_currency(results['net_working_capital']), format_currency(results['capital_employed'])]}
-        st.dataframe(pd.DataFrame(bs_data), hide_index=True, use_container_width=True, column_config={"Item": st.column_config.Column(width="medium"), "Amount (INR)": st.column_config.Column(width="small")})
+        st.dataframe(_build_statement_df(_MODEL_VERSION, _BS_ROWS, "Item", tuple(results[key] for _, key, _ in _BS_ROWS)), hide_index=True, use_container_width=True, column_config=_BS_COLUMN_CONFIG)
+
+# --- Main Dashboard Rendering ---
+def render_dashboard(inputs):
+    results = calculate_financials(inputs)
+    if 'error' in results: st.error(results['error']); return
+    if results['byproduct_limit_hit']: st.markdown(f"""<div class="warning-box"><strong>⚠️ Byproduct Constraint:</strong> Trying to sell {inputs['byproduct_sale_percent']:.1f}% ({results['daily_byproduct_target']:,.0f} kg/day) but only {results['daily_byproduct_gen']:,.0f} kg/day is generated. <br><strong>Suggestion:</strong> Reduce 'Byproduct Sale %' in the sidebar to be less than the available amount.</div>""", unsafe_allow_html=True)
+    render_kpis(results)
+    st.divider()
+    st.header("📊 Production & Financial Summary")
+    st.markdown(_build_summary_table(_MODEL_VERSION, tuple(results[k] for k in _SUMMARY_KEYS), results['operating_days']), unsafe_allow_html=True)
+    st.divider()
+    render_breakeven(inputs, results)
+    st.divider()
+    render_sensitivity(inputs)
+    st.divider()
+    render_financial_statements(results)
     st.divider()
-    render_detailed_breakdowns(results)
+    render_detailed_breakdowns(inputs, results)
 
 # --- Main Execution ---
 if __name__ == "__main__":